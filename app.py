@@ -1,12 +1,30 @@
 import os
+
+# Eventlet has to patch the standard library before anything else imports it
+async_mode = os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet')
+if async_mode == 'eventlet':
+    import eventlet
+    from eventlet import tpool
+    eventlet.monkey_patch()
+
+import gc
 import json
 import random
+import re
+from functools import lru_cache
+from collections import Counter, deque, namedtuple
 from datetime import datetime, timedelta
-from flask import Flask, render_template
+from flask import Flask, render_template, request
 from flask_socketio import SocketIO
 from dotenv import load_dotenv
+import orjson
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Raise the GC thresholds so short-lived tokenizer and tensor objects are freed
+# in the young generation without triggering frequent full collections
+gen0, gen1, gen2 = gc.get_threshold()
+gc.set_threshold(gen0 * 3, gen1 * 3, gen2 * 3)
 
 # Add a startup message
 print("Initializing Sentiment Analysis Dashboard...")
@@ -21,25 +39,87 @@ load_dotenv()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'sentiment-analysis-secret')
 
-# Configure SocketIO with CORS - using threading as default async_mode
+class OrjsonSerializer:
+    """Drop-in replacement for the json module used to encode SocketIO packets"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+# Configure SocketIO with CORS - using eventlet as default async_mode
 socketio = SocketIO(app, 
                    cors_allowed_origins=os.environ.get('CORS_ORIGINS', '*'),
-                   async_mode='threading')
+                   async_mode=async_mode,
+                   json=OrjsonSerializer)
+
+# Source names shown on the dashboard
+TWITTER_SOURCE = 'Twitter'
+REDDIT_SOURCE = 'Reddit'
+
+# Sample texts used to generate data in demo mode
+SAMPLE_TEXTS = [
+    "I love this new product! It's amazing and works perfectly.",
+    "The service was terrible and the staff was rude.",
+    "Just bought the latest smartphone and it's okay, nothing special.",
+    "Can't believe how bad the weather is today.",
+    "The movie was fantastic, highly recommend watching it.",
+    "This restaurant has the best food in town!",
+    "So disappointed with my recent purchase, it broke after one use.",
+    "Not sure how I feel about the new update, some good features but also some problems.",
+    "The concert last night was incredible!",
+    "Just had a mediocre experience at the new cafe downtown."
+]
+
+# Possible ages of generated sample items, from 1 to 60 minutes
+SAMPLE_AGES = tuple(timedelta(minutes=minutes) for minutes in range(1, 61))
 
 # Initialize analyzers and collectors
 print("Loading sentiment analysis model...")
-sentiment_analyzer = SentimentAnalyzer()
+sentiment_analyzer = SentimentAnalyzer(
+    use_onnx=os.environ.get('USE_ONNX', 'False').lower() == 'true',
+    compile_model=os.environ.get('TORCH_COMPILE', 'False').lower() == 'true'
+)
 print("Initializing Twitter collector...")
 twitter_collector = TwitterCollector()
 print("Initializing Reddit collector...")
 reddit_collector = RedditCollector()
 print("Initialization complete!")
 
+# Move the long-lived model and collector objects out of future GC scans
+gc.freeze()
+
+# Demo mode generates sample data instead of collecting it
+demo_mode = False
+
+# Sample texts with their sentiment, scored once when demo mode starts
+scored_sample_texts = []
+
+def collectors_disabled():
+    """Whether no collector has a usable client, either from startup or after failing on first use"""
+    return twitter_collector.client is None and reddit_collector.client is None
+
+def start_demo_mode(reason):
+    """Switch to generating sample data, scoring the sample texts once"""
+    global demo_mode, scored_sample_texts
+    demo_mode = True
+    if not scored_sample_texts:
+        scored_sample_texts = list(zip(SAMPLE_TEXTS, sentiment_analyzer.analyze_batch(SAMPLE_TEXTS)))
+    print(f"RUNNING IN DEMO MODE: {reason}. Will generate sample data.")
+    print("To use real data, please check the API keys in the .env file and the network connection.")
+
 # Check if we are in demo mode (no API keys)
-demo_mode = twitter_collector.client is None and reddit_collector.client is None
-if demo_mode:
-    print("RUNNING IN DEMO MODE: No valid API keys found. Will generate sample data.")
-    print("To use real data, please add valid API keys to the .env file.")
+if collectors_disabled():
+    start_demo_mode("No valid API keys found")
+
+# An analyzed item; lighter than a dict, converted with _asdict() when emitted
+Item = namedtuple('Item', ['text', 'source', 'timestamp', 'sentiment', 'url'])
+
+# Number of recent items kept for the dashboard table
+MAX_RECENT_ITEMS = 100
 
 # Global data storage
 sentiment_data = {
@@ -50,69 +130,123 @@ sentiment_data = {
         'twitter': 0,
         'reddit': 0
     },
-    'recent_items': []
+    # Most recent items first; older items are dropped automatically
+    'recent_items': deque(maxlen=MAX_RECENT_ITEMS)
 }
 
-# Configuration storage
-config = {
-    'search_terms': os.getenv('SEARCH_TERMS', 'python,data science,AI').split(','),
-    'max_items': int(os.getenv('MAX_ITEMS', '100'))
-}
+# Lock for thread-safe access to sentiment_data
+data_lock = threading.Lock()
+
+# Snapshot of sentiment_data sent to new clients, rebuilt only after the data changes
+sentiment_snapshot = None
+
+def parse_search_terms(value):
+    """Parse a comma-separated string into an immutable tuple of search terms"""
+    return tuple(term.strip() for term in value.split(',') if term.strip())
+
+@lru_cache(maxsize=8)
+def compile_search_terms(search_terms):
+    """Compile the search terms into one case-insensitive pattern matching any of them as whole words"""
+    alternatives = (r'\s+'.join(re.escape(word) for word in term.split()) for term in search_terms)
+    # Lookarounds rather than \b, so terms starting or ending in symbols (C++, #python) still match
+    return re.compile('|'.join(rf'(?<!\w)(?:{alternative})(?!\w)' for alternative in alternatives), re.IGNORECASE)
 
-# Lock for thread-safe access to config
-config_lock = threading.Lock()
+# Configuration storage. The config is immutable and replaced as a whole on update,
+# so readers can use it without locking
+Config = namedtuple('Config', ['search_terms', 'max_items'])
+config = Config(
+    search_terms=parse_search_terms(os.getenv('SEARCH_TERMS', 'python,data science,AI')),
+    max_items=int(os.getenv('MAX_ITEMS', '100'))
+)
+
+# Config updates received but not yet applied, and the timer that applies them
+staged_config = {}
+config_timer = None
+
+# Lock for thread-safe access to the staged config and its timer
+staged_config_lock = threading.Lock()
+
+# Quiet period after the last config update before it is applied
+CONFIG_DEBOUNCE_SECONDS = 0.2
 
 # Flag to signal the analyzer thread to refresh its config
 refresh_config = threading.Event()
 
+# Number of connected clients; the analyzer pauses while nobody is watching
+active_clients = 0
+clients_changed = threading.Condition()
+
+# Whether the analyzer background task has been started in this process
+analyzer_started = False
+
+# Thread pool for running the Twitter and Reddit collectors concurrently
+collector_pool = ThreadPoolExecutor(max_workers=2)
+
+# Maximum time to wait for a collector before giving up on it for this cycle
+COLLECTION_TIMEOUT = 120
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @socketio.on('connect')
 def handle_connect():
+    global active_clients
     print('Client connected')
-    # Send initial data to new clients
-    socketio.emit('update_data', sentiment_data)
+    with clients_changed:
+        active_clients += 1
+        clients_changed.notify_all()
+    # Send the full data snapshot to the new client only; later cycles send deltas
+    socketio.emit('update_data', get_sentiment_snapshot(), to=request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    global active_clients
     print('Client disconnected')
+    with clients_changed:
+        active_clients = max(0, active_clients - 1)
 
 @socketio.on('get_config')
 def handle_get_config():
     """Handle request for current configuration"""
-    with config_lock:
-        socketio.emit('config_data', {
-            'search_terms': config['search_terms'],
-            'max_items': config['max_items']
-        })
+    socketio.emit('config_data', config._asdict())
 
 @socketio.on('update_config')
 def handle_update_config(data):
-    """Handle updates to the configuration"""
-    global config
+    """Stage updates to the configuration, applying them once updates stop arriving"""
+    global config_timer
     
     print(f"Received config update: {data}")
-    update_made = False
     
-    with config_lock:
-        # Update search terms if provided
+    with staged_config_lock:
+        # Stage search terms if provided
         if 'search_terms' in data:
-            # Parse the comma-separated string into a list
-            new_terms = [term.strip() for term in data['search_terms'].split(',')]
-            if new_terms != config['search_terms']:
-                config['search_terms'] = new_terms
-                update_made = True
-                print(f"Updated search terms to: {config['search_terms']}")
+            staged_config['search_terms'] = parse_search_terms(data['search_terms'])
         
-        # Update max items if provided
+        # Stage max items if provided
         if 'max_items' in data:
-            new_max = data['max_items']
-            if new_max != config['max_items']:
-                config['max_items'] = new_max
-                update_made = True
-                print(f"Updated max items to: {config['max_items']}")
+            staged_config['max_items'] = data['max_items']
+        
+        # Restart the debounce timer so rapid updates are applied together
+        if config_timer is not None:
+            config_timer.cancel()
+        config_timer = threading.Timer(CONFIG_DEBOUNCE_SECONDS, commit_config)
+        config_timer.daemon = True
+        config_timer.start()
+
+def commit_config():
+    """Apply the staged configuration updates"""
+    global config, config_timer
+    
+    with staged_config_lock:
+        config_timer = None
+        new_config = config._replace(**staged_config)
+        staged_config.clear()
+        
+        update_made = new_config != config
+        if update_made:
+            config = new_config
+            print(f"Updated config to: {config}")
     
     # If updates were made, signal analyzer thread to refresh
     if update_made:
@@ -120,75 +254,84 @@ def handle_update_config(data):
         reset_sentiment_data()
         # Signal the analyzer thread
         refresh_config.set()
-        # Send the updated config back to all clients
-        socketio.emit('config_data', {
-            'search_terms': config['search_terms'],
-            'max_items': config['max_items']
+        # Send the updated config and the cleared data to all clients in one message
+        socketio.emit('config_and_reset', {
+            'config': new_config._asdict(),
+            'data': get_sentiment_snapshot()
         })
 
 def reset_sentiment_data():
-    """Reset the sentiment data counters and items"""
-    global sentiment_data
-    sentiment_data = {
-        'positive': 0,
-        'negative': 0,
-        'neutral': 0,
-        'sources': {
-            'twitter': 0,
-            'reddit': 0
-        },
-        'recent_items': []
-    }
-    socketio.emit('update_data', sentiment_data)
+    """Reset the sentiment data counters and items in place"""
+    global sentiment_snapshot
+    with data_lock:
+        sentiment_snapshot = None
+        sentiment_data['positive'] = 0
+        sentiment_data['negative'] = 0
+        sentiment_data['neutral'] = 0
+        sentiment_data['sources']['twitter'] = 0
+        sentiment_data['sources']['reddit'] = 0
+        sentiment_data['recent_items'].clear()
+
+def get_sentiment_snapshot():
+    """Return a JSON-serializable copy of the sentiment data, reusing it until the data changes"""
+    global sentiment_snapshot
+    with data_lock:
+        if sentiment_snapshot is None:
+            sentiment_snapshot = {
+                'positive': sentiment_data['positive'],
+                'negative': sentiment_data['negative'],
+                'neutral': sentiment_data['neutral'],
+                'sources': dict(sentiment_data['sources']),
+                'recent_items': [item._asdict() for item in sentiment_data['recent_items']],
+                # Lets clients trim their copy of recent_items the same way the server does
+                'max_recent_items': MAX_RECENT_ITEMS
+            }
+        return sentiment_snapshot
 
 def generate_sample_data(count=10):
     """Generate sample data for demo mode"""
-    sample_texts = [
-        "I love this new product! It's amazing and works perfectly.",
-        "The service was terrible and the staff was rude.",
-        "Just bought the latest smartphone and it's okay, nothing special.",
-        "Can't believe how bad the weather is today.",
-        "The movie was fantastic, highly recommend watching it.",
-        "This restaurant has the best food in town!",
-        "So disappointed with my recent purchase, it broke after one use.",
-        "Not sure how I feel about the new update, some good features but also some problems.",
-        "The concert last night was incredible!",
-        "Just had a mediocre experience at the new cafe downtown."
-    ]
-    
-    sources = ['Twitter', 'Reddit']
-    sample_data = []
+    samples = random.choices(scored_sample_texts, k=count)
+    sources = random.choices([TWITTER_SOURCE, REDDIT_SOURCE], k=count)
+    ages = random.choices(SAMPLE_AGES, k=count)
+    now = datetime.now()
     
-    for _ in range(count):
-        text = random.choice(sample_texts)
-        source = random.choice(sources)
-        timestamp = (datetime.now() - timedelta(minutes=random.randint(1, 60))).isoformat()
-        sentiment = sentiment_analyzer.analyze(text)
-        
-        sample_data.append({
-            'text': text,
-            'source': source,
-            'timestamp': timestamp,
-            'sentiment': sentiment,
-            'url': 'https://example.com/sample'
-        })
-        
-    return sample_data
+    return [
+        Item(text, source, (now - age).isoformat(), sentiment, 'https://example.com/sample')
+        for (text, sentiment), source, age in zip(samples, sources, ages)
+    ]
+
+def run_blocking(func, *args):
+    """Run CPU-bound work, in a native thread under eventlet so it doesn't stall the hub"""
+    if async_mode == 'eventlet':
+        return tpool.execute(func, *args)
+    return func(*args)
+
+def get_collected(future, source):
+    """Wait for a collector future, returning no items if it times out"""
+    try:
+        return future.result(timeout=COLLECTION_TIMEOUT)
+    except FutureTimeoutError:
+        print(f"Timed out collecting {source} data, skipping this cycle")
+        return []
 
 def analyze_content():
-    global sentiment_data, config
+    global sentiment_snapshot
     
     while True:
         try:
+            # Don't collect or analyze anything while no clients are connected
+            with clients_changed:
+                if active_clients == 0:
+                    print("No clients connected, pausing analysis...")
+                    clients_changed.wait_for(lambda: active_clients > 0)
+            
             # Check if config needs to be refreshed
             if refresh_config.is_set():
                 print("Refreshing configuration...")
                 refresh_config.clear()
             
-            # Get current config safely
-            with config_lock:
-                search_terms = config['search_terms'].copy()
-                max_items = config['max_items']
+            # Take the current config; it is immutable so no lock or copy is needed
+            search_terms, max_items = config
             
             print(f"Analyzing with terms: {search_terms}, max items: {max_items}")
             
@@ -198,55 +341,74 @@ def analyze_content():
                 # In demo mode, generate sample data
                 print("Generating sample data...")
                 all_items = generate_sample_data(10)  # Generate 10 sample items
-                
-                for item in all_items:
-                    if item['source'] == 'Twitter':
-                        sentiment_data['sources']['twitter'] += 1
-                    else:
-                        sentiment_data['sources']['reddit'] += 1
-                    
-                    sentiment_data[item['sentiment']] += 1
             else:
                 # In normal mode, collect real data
-                # Collect tweets
-                tweets = twitter_collector.collect(search_terms, max_items // 2)
+                # Collect tweets and Reddit posts concurrently
+                tweets_future = collector_pool.submit(twitter_collector.collect, search_terms, max_items // 2)
+                reddit_future = collector_pool.submit(reddit_collector.collect, search_terms, max_items // 2)
+                tweets = get_collected(tweets_future, 'Twitter')
+                reddit_posts = get_collected(reddit_future, 'Reddit')
                 
-                # Collect Reddit posts
-                reddit_posts = reddit_collector.collect(search_terms, max_items // 2)
+                # Twitter credentials are only checked on first use, so every collector may
+                # have just disabled itself; fall back to sample data from the next cycle
+                if collectors_disabled():
+                    run_blocking(start_demo_mode, "All data collectors were disabled after errors")
+                    continue
                 
-                # Analyze tweets
-                for tweet in tweets:
-                    sentiment = sentiment_analyzer.analyze(tweet['text'])
-                    all_items.append({
-                        'text': tweet['text'],
-                        'source': 'Twitter',
-                        'timestamp': tweet['created_at'],
-                        'sentiment': sentiment,
-                        'url': tweet['url'] if 'url' in tweet else None
-                    })
-                    sentiment_data['sources']['twitter'] += 1
-                    sentiment_data[sentiment] += 1
+                # Drop results that only matched on metadata, so they don't cost a model pass
+                search_pattern = compile_search_terms(search_terms)
+                tweets = [tweet for tweet in tweets if search_pattern.search(tweet['text'])]
+                reddit_posts = [post for post in reddit_posts if search_pattern.search(post['text'])]
                 
-                # Analyze Reddit posts
-                for post in reddit_posts:
-                    sentiment = sentiment_analyzer.analyze(post['text'])
-                    all_items.append({
-                        'text': post['text'],
-                        'source': 'Reddit',
-                        'timestamp': post['created_at'],
-                        'sentiment': sentiment,
-                        'url': post['url']
-                    })
-                    sentiment_data['sources']['reddit'] += 1
-                    sentiment_data[sentiment] += 1
+                # Analyze tweets and Reddit posts in a single batch
+                texts = [tweet['text'] for tweet in tweets] + [post['text'] for post in reddit_posts]
+                sentiments = run_blocking(sentiment_analyzer.analyze_batch, texts)
+                tweet_sentiments = sentiments[:len(tweets)]
+                reddit_sentiments = sentiments[len(tweets):]
+                
+                all_items = [
+                    Item(tweet['text'], TWITTER_SOURCE, tweet['created_at'], sentiment, tweet.get('url'))
+                    for tweet, sentiment in zip(tweets, tweet_sentiments)
+                ] + [
+                    Item(post['text'], REDDIT_SOURCE, post['created_at'], sentiment, post['url'])
+                    for post, sentiment in zip(reddit_posts, reddit_sentiments)
+                ]
             
-            # Keep only the most recent items
-            sentiment_data['recent_items'] = (all_items + sentiment_data['recent_items'])[:100]
+            # Count this cycle's changes locally, then apply them to the totals in one step.
+            # The lock is only held for that merge, so readers never wait on collection or analysis.
+            sentiment_counts = Counter(item.sentiment for item in all_items)
+            source_counts = Counter(item.source for item in all_items)
+            deltas = {
+                'positive': sentiment_counts['positive'],
+                'negative': sentiment_counts['negative'],
+                'neutral': sentiment_counts['neutral'],
+                'twitter': source_counts[TWITTER_SOURCE],
+                'reddit': source_counts[REDDIT_SOURCE]
+            }
             
-            # Emit the updated data
-            socketio.emit('update_data', sentiment_data)
+            with data_lock:
+                sentiment_snapshot = None
+                sentiment_data['positive'] += deltas['positive']
+                sentiment_data['negative'] += deltas['negative']
+                sentiment_data['neutral'] += deltas['neutral']
+                sentiment_data['sources']['twitter'] += deltas['twitter']
+                sentiment_data['sources']['reddit'] += deltas['reddit']
+                
+                # Keep only the most recent items
+                sentiment_data['recent_items'].extendleft(reversed(all_items))
+                
+                totals = (sentiment_data['positive'], sentiment_data['negative'], sentiment_data['neutral'])
+                
+                # Emit only what changed; clients apply it to their own copy.
+                # Emitted under the lock so a client connecting now gets either a snapshot
+                # without this cycle followed by the delta, or a snapshot that includes it
+                if all_items:
+                    socketio.emit('update_delta', {
+                        'deltas': deltas,
+                        'new_items': [item._asdict() for item in all_items]
+                    })
             
-            print(f"Analyzed {len(all_items)} new items. Total: positive={sentiment_data['positive']}, negative={sentiment_data['negative']}, neutral={sentiment_data['neutral']}")
+            print(f"Analyzed {len(all_items)} new items. Total: positive={totals[0]}, negative={totals[1]}, neutral={totals[2]}")
             
             # Wait before the next collection
             sleep_time = 10 if demo_mode else 60  # Faster updates in demo mode
@@ -257,12 +419,18 @@ def analyze_content():
             
         except Exception as e:
             print(f"Error in analysis loop: {e}")
-            time.sleep(10)  # Wait a bit before retrying
+            socketio.sleep(10)  # Wait a bit before retrying
+
+def start_analyzer():
+    """Start the analyzer as a background task of the SocketIO server, once per process"""
+    global analyzer_started
+    if not analyzer_started:
+        analyzer_started = True
+        socketio.start_background_task(analyze_content)
 
 if __name__ == '__main__':
-    # Start the analyzer in a background thread
-    analyzer_thread = threading.Thread(target=analyze_content, daemon=True)
-    analyzer_thread.start()
+    # Start the analyzer in the background
+    start_analyzer()
     
     # Get port from environment variable for deployment compatibility
     port = int(os.environ.get('PORT', 5000))
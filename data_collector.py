@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+__all__ = ['TwitterCollector', 'RedditCollector']
+
 class TwitterCollector:
     def __init__(self):
         # Initialize Twitter API client
@@ -15,6 +17,9 @@ class TwitterCollector:
         access_token = os.getenv('TWITTER_ACCESS_TOKEN')
         access_token_secret = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
         
+        # Credentials are verified on first use rather than delaying startup
+        self.verified = False
+        
         # Check if credentials are set
         if not all([api_key, api_key_secret, access_token, access_token_secret]):
             print("Notice: Twitter API credentials not found in .env file")
@@ -29,16 +34,16 @@ class TwitterCollector:
                 api_key, api_key_secret, access_token, access_token_secret
             )
             self.client = tweepy.API(auth)
-            
-            # Test connection
-            self.client.verify_credentials()
-            print("Twitter API authentication successful")
         except Exception as e:
-            print(f"Error connecting to Twitter API: {e}")
-            print("This may be due to incorrect credentials or Twitter API payment constraints.")
-            print("Twitter API access requires a paid Developer Account subscription.")
-            print("Twitter data collection will be disabled")
-            self.client = None
+            self._disable(e)
+    
+    def _disable(self, error):
+        """Disable Twitter collection after a connection or authentication error."""
+        print(f"Error connecting to Twitter API: {error}")
+        print("This may be due to incorrect credentials or Twitter API payment constraints.")
+        print("Twitter API access requires a paid Developer Account subscription.")
+        print("Twitter data collection will be disabled")
+        self.client = None
         
     def collect(self, search_terms, max_items=50):
         """Collect tweets containing the specified search terms."""
@@ -46,35 +51,43 @@ class TwitterCollector:
             # Silently return empty list when Twitter is disabled
             return []
             
+        if not search_terms:
+            return []
+        
+        # Test connection the first time tweets are collected
+        if not self.verified:
+            try:
+                self.client.verify_credentials()
+                self.verified = True
+                print("Twitter API authentication successful")
+            except Exception as e:
+                self._disable(e)
+                return []
+            
         collected_tweets = []
         
         try:
-            # Collect tweets for each search term
-            items_per_term = max(1, max_items // len(search_terms))
+            # Search for all terms with a single query instead of one request per term
+            query = " OR ".join(f'"{term}"' for term in search_terms)
+            print(f"Collecting tweets for: {query}")
+            tweets = tweepy.Cursor(
+                self.client.search_tweets,
+                q=f"({query}) -filter:retweets", # Exclude retweets
+                tweet_mode="extended",
+                lang="en",
+                result_type="recent"
+            ).items(max_items)
+            
+            # Process tweets
+            for tweet in tweets:
+                tweet_data = {
+                    'text': tweet.full_text if hasattr(tweet, 'full_text') else tweet.text,
+                    'created_at': tweet.created_at.isoformat(),
+                    'url': f"https://twitter.com/user/status/{tweet.id}"
+                }
+                collected_tweets.append(tweet_data)
             
-            for term in search_terms:
-                print(f"Collecting tweets for: {term}")
-                # Search for tweets
-                tweets = tweepy.Cursor(
-                    self.client.search_tweets,
-                    q=term + " -filter:retweets", # Exclude retweets
-                    tweet_mode="extended",
-                    lang="en",
-                    result_type="recent"
-                ).items(items_per_term)
-                
-                # Process tweets
-                term_count = 0
-                for tweet in tweets:
-                    tweet_data = {
-                        'text': tweet.full_text if hasattr(tweet, 'full_text') else tweet.text,
-                        'created_at': tweet.created_at.isoformat(),
-                        'url': f"https://twitter.com/user/status/{tweet.id}"
-                    }
-                    collected_tweets.append(tweet_data)
-                    term_count += 1
-                
-                print(f"  Collected {term_count} tweets for '{term}'")
+            print(f"  Collected {len(collected_tweets)} tweets")
                     
             return collected_tweets
             
@@ -116,32 +129,31 @@ class RedditCollector:
             print("Reddit client not initialized. Check API credentials in .env file.")
             return []
             
+        if not search_terms:
+            return []
+            
         collected_posts = []
         
         try:
-            # Collect posts for each search term
-            items_per_term = max(1, max_items // len(search_terms))
+            # Search for all terms with a single query instead of one request per term
+            query = " OR ".join(f'"{term}"' for term in search_terms)
+            print(f"Collecting Reddit posts for: {query}")
+            
+            # Search for posts
+            for submission in self.client.subreddit("all").search(query, limit=max_items, sort="new"):
+                # Combine title and selftext for analysis
+                full_text = submission.title
+                if submission.selftext:
+                    full_text += " " + submission.selftext
+                    
+                post_data = {
+                    'text': full_text,
+                    'created_at': datetime.fromtimestamp(submission.created_utc).isoformat(),
+                    'url': f"https://reddit.com{submission.permalink}"
+                }
+                collected_posts.append(post_data)
             
-            for term in search_terms:
-                print(f"Collecting Reddit posts for: {term}")
-                term_count = 0
-                
-                # Search for posts
-                for submission in self.client.subreddit("all").search(term, limit=items_per_term, sort="new"):
-                    # Combine title and selftext for analysis
-                    full_text = submission.title
-                    if submission.selftext:
-                        full_text += " " + submission.selftext
-                        
-                    post_data = {
-                        'text': full_text,
-                        'created_at': datetime.fromtimestamp(submission.created_utc).isoformat(),
-                        'url': f"https://reddit.com{submission.permalink}"
-                    }
-                    collected_posts.append(post_data)
-                    term_count += 1
-                
-                print(f"  Collected {term_count} Reddit posts for '{term}'")
+            print(f"  Collected {len(collected_posts)} Reddit posts")
                     
             return collected_posts
             
@@ -0,0 +1,26 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Flask-SocketIO needs sticky sessions to spread clients over several workers,
+# which gunicorn's load balancing cannot provide, so a single worker is used.
+# Inference in that worker still uses every core through PyTorch's thread pool.
+workers = 1
+
+# The eventlet worker needs gunicorn 21.2-23.x with the pinned eventlet 0.33:
+# older releases import a name eventlet has removed, newer ones require eventlet 0.40.3+
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet') == 'eventlet':
+    worker_class = 'eventlet'
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', '100'))
+
+# Loading the sentiment model on first start can take minutes
+timeout = 300
+
+
+def post_worker_init(worker):
+    # The analyzer is only started from app.py's __main__ block, so start it here
+    # when the app is served by gunicorn instead
+    from app import start_analyzer
+    start_analyzer()
@@ -1,109 +1,415 @@
-import re
-import nltk
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import numpy as np
 import os
 
+# Set cache directory explicitly to avoid permission issues.
+# Done before importing transformers, which reads it at import time
+os.environ['TRANSFORMERS_CACHE'] = os.path.join(os.getcwd(), 'models_cache')
+
+import re
+import importlib.util
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Patterns used by clean_text, compiled once at import
+# URLs, user mentions and hashtags are removed in a single pass
+_NOISE_RE = re.compile(r'http\S+|www\S+|@\w+|#\w+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Splits text into words for the fallback analysis
+_WORD_RE = re.compile(r'\w+')
+
+# torch and transformers are imported on first use, so the basic analysis works without them
+TRANSFORMERS_AVAILABLE = (importlib.util.find_spec('torch') is not None
+                          and importlib.util.find_spec('transformers') is not None)
+torch = None
+AutoTokenizer = None
+AutoModelForSequenceClassification = None
+
+def _import_model_libraries():
+    """Import torch and transformers into the module namespace the first time they are needed."""
+    global torch, AutoTokenizer, AutoModelForSequenceClassification
+    if torch is None:
+        import torch as _torch
+        from transformers import AutoTokenizer as _AutoTokenizer, AutoModelForSequenceClassification as _AutoModel
+        torch, AutoTokenizer, AutoModelForSequenceClassification = _torch, _AutoTokenizer, _AutoModel
+
+# Loaded (tokenizer, model, device) entries shared by all analyzers, keyed by model name and load options
+_MODEL_CACHE = {}
+
+# Analyzer used by each analyze_many worker process
+_worker_analyzer = None
+
+def _init_worker(options):
+    """Load the model once in a worker process, using a single thread so workers don't oversubscribe the CPU."""
+    global _worker_analyzer
+    # Also stops the model loader from raising the thread count again from the inherited environment
+    os.environ['TORCH_NUM_THREADS'] = '1'
+    if TRANSFORMERS_AVAILABLE:
+        _import_model_libraries()
+        torch.set_num_threads(1)
+    _worker_analyzer = SentimentAnalyzer(**options)
+
+def _analyze_shard(cleaned_texts):
+    """Analyze a shard of cleaned texts in a worker process, returning labels and fallback positions."""
+    return _worker_analyzer._analyze_cleaned(cleaned_texts)
+
 class SentimentAnalyzer:
-    def __init__(self):
-        # Download necessary NLTK resources
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            print("Downloading NLTK punkt tokenizer...")
-            nltk.download('punkt')
-        
-        # Set cache directory explicitly to avoid permission issues
-        os.environ['TRANSFORMERS_CACHE'] = os.path.join(os.getcwd(), 'models_cache')
-        
+    # Positive and negative words for the fallback analysis, built once rather than per call.
+    # Words are matched whole, so common inflected forms are listed explicitly
+    POSITIVE_WORDS = frozenset((
+        'good', 'great', 'awesome', 'excellent', 'like', 'likes', 'liked', 'love', 'loves', 'loved',
+        'loving', 'happy', 'best', 'better', 'amazing'
+    ))
+    NEGATIVE_WORDS = frozenset((
+        'bad', 'worst', 'terrible', 'awful', 'hate', 'hates', 'hated', 'dislike', 'dislikes', 'disliked',
+        'sad', 'disappointing', 'disappointed', 'sucks', 'sucked', 'poor'
+    ))
+    
+    def __init__(self, batch_size=32, quantize=True, use_onnx=False, cache_size=4096, compile_model=False):
         # Load pre-trained model and tokenizer
         self.model_name = "distilbert-base-uncased-finetuned-sst-2-english"
+        
+        # Tweets and post titles are short, so cap sequences well below the model's 512 tokens
+        self.max_length = 128
+        
+        # Number of full-length texts sent through the model in one forward pass;
+        # shorter texts are grouped into larger batches with the same token budget
+        self.batch_size = batch_size
+        
+        if TRANSFORMERS_AVAILABLE:
+            _import_model_libraries()
+            
+            # Run on the GPU when one is available
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            
+            # On the GPU, round padded lengths up to a multiple of 8 so batches reuse a few
+            # tensor shapes that suit tensor cores and the caching allocator
+            self.pad_to_multiple_of = 8 if self.device.type == 'cuda' else None
+            
+            # Reuse a model already loaded with the same options by another analyzer
+            cache_key = (self.model_name, self.device.type, use_onnx, quantize, compile_model)
+            if cache_key in _MODEL_CACHE:
+                self.tokenizer, self.model, self.device = _MODEL_CACHE[cache_key]
+            else:
+                self._load(use_onnx, quantize, compile_model)
+                if self.model is not None:
+                    _MODEL_CACHE[cache_key] = (self.tokenizer, self.model, self.device)
+        else:
+            print("PyTorch or transformers not installed, using basic sentiment analysis")
+            self.device = None
+            self.pad_to_multiple_of = None
+            self.tokenizer = None
+            self.model = None
+        
+        # Options needed to build the same analyzer in analyze_many worker processes
+        self._options = {'batch_size': batch_size, 'quantize': quantize, 'use_onnx': use_onnx,
+                         'cache_size': cache_size, 'compile_model': compile_model}
+        
+        # Define sentiment labels
+        self.labels = ['negative', 'positive']
+        
+        # Labels indexed by prediction, where index -1 marks a borderline (neutral) prediction
+        self._prediction_labels = self.labels + ['neutral']
+        
+        # Cache results for repeated texts, since the analysis is deterministic.
+        # Keyed on cleaned text and ordered from least to most recently used
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+    
+    def _load(self, use_onnx, quantize, compile_model):
+        """Load the tokenizer and model, falling back to basic analysis if that fails."""
         print(f"Loading BERT model: {self.model_name}")
         print("This may take a few minutes on first run...")
         
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                self.model_name, use_fast=True, model_max_length=self.max_length
+            )
+            if self.tokenizer.is_fast:
+                print("Using fast (Rust) tokenizer")
+            else:
+                print("Warning: fast tokenizer not available, using the slower Python tokenizer")
+            self.model = self._load_onnx_model() if use_onnx else None
+            if self.model is None:
+                self.model = self._load_transformers_model(quantize, compile_model)
             print("BERT model loaded successfully!")
         except Exception as e:
             print(f"Error loading BERT model: {e}")
             print("Falling back to basic sentiment analysis...")
             self.tokenizer = None
             self.model = None
+    
+    def _load_transformers_model(self, quantize, compile_model):
+        """Load the PyTorch model, optimized for the device it runs on."""
+        # Load the weights directly in their stored dtype, without a full-size fp32 staging copy
+        model = AutoModelForSequenceClassification.from_pretrained(
+            self.model_name, torch_dtype="auto", low_cpu_mem_usage=True
+        )
+        model.eval()
         
-        # Define sentiment labels
-        self.labels = ['negative', 'positive']
+        if self.device.type == 'cuda':
+            # Half precision halves weight traffic and uses the GPU's tensor cores
+            model = model.half().to(self.device)
+            print("BERT model running on GPU in fp16")
+        else:
+            # Limit PyTorch threads if requested, e.g. when sharing the CPU with other processes
+            num_threads = os.environ.get('TORCH_NUM_THREADS')
+            if num_threads:
+                torch.set_num_threads(int(num_threads))
+            
+            # Quantize the linear layers to int8 for faster CPU inference
+            if quantize:
+                try:
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                    print("BERT model quantized to int8")
+                except Exception as e:
+                    print(f"Could not quantize BERT model, using full precision: {e}")
+        
+        if compile_model:
+            model = self._compile_model(model)
+        
+        return model
+    
+    def _compile_model(self, model):
+        """Compile the model with torch.compile, keeping the eager model if that fails."""
+        # Length buckets vary both the batch size and the padded length, so compile with dynamic
+        # shapes instead of once per shape. CUDA graphs (reduce-overhead) are not used, since they
+        # would still record a new graph for every shape
+        try:
+            compiled = torch.compile(model, dynamic=True)
+            
+            # Compilation happens on the first call, so do it at load time. The warm-up batch has
+            # two texts because size-1 dimensions are specialized; a later single-text batch
+            # still compiles once more
+            warmup = self.tokenizer(["warm up", "warm up the model"], padding=True, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                compiled(**warmup)
+            print("BERT model compiled with torch.compile (dynamic shapes)")
+            return compiled
+        except Exception as e:
+            print(f"Could not compile BERT model, running it eagerly: {e}")
+            return model
+    
+    def _load_onnx_model(self):
+        """Export the model to ONNX Runtime with graph optimizations, or return None if unavailable."""
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError:
+            print("ONNX Runtime requested but optimum[onnxruntime] is not installed, using PyTorch")
+            return None
+        
+        try:
+            # Enable all graph optimizations, including attention and LayerNorm/GELU fusion
+            session_options = onnxruntime.SessionOptions()
+            session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            
+            model = ORTModelForSequenceClassification.from_pretrained(
+                self.model_name, export=True, provider="CPUExecutionProvider", session_options=session_options
+            )
+        except Exception as e:
+            print(f"Could not export BERT model to ONNX Runtime, using PyTorch: {e}")
+            return None
+        self.device = torch.device('cpu')
+        print("BERT model running on ONNX Runtime")
+        return model
     
     def clean_text(self, text):
         """Clean text by removing URLs, mentions, hashtags, and special characters."""
         # Convert to string if not already
         if not isinstance(text, str):
             text = str(text)
-            
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
         
-        # Remove user mentions and hashtags
-        text = re.sub(r'@\w+|\#\w+', '', text)
+        if not text:
+            return text
+            
+        # Remove URLs, user mentions and hashtags, skipping the regex when none can be present
+        if 'http' in text or 'www' in text or '@' in text or '#' in text:
+            text = _NOISE_RE.sub('', text)
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_RE.sub(' ', text).strip()
         
         return text
     
     def analyze(self, text):
-        """Analyze the sentiment of a text using the pre-trained model."""
-        # Clean the text
-        cleaned_text = self.clean_text(text)
+        """Analyze the sentiment of a single text."""
+        return self.analyze_batch([text])[0]
+    
+    def _cached_result(self, text):
+        """Return the cached result for a cleaned text, or None, marking it as recently used."""
+        sentiment = self._cache.get(text)
+        if sentiment is not None:
+            self._cache.move_to_end(text)
+        return sentiment
+    
+    def _cache_result(self, text, sentiment):
+        """Store a result in the cache, evicting the least recently used entry when full."""
+        # A cache size of zero or less turns caching off
+        if self._cache_size <= 0:
+            return
+        if len(self._cache) >= self._cache_size:
+            self._cache.popitem(last=False)
+        self._cache[text] = sentiment
+    
+    def analyze_batch(self, texts):
+        """Analyze the sentiment of a list of texts, running the model only on unseen texts."""
+        return self._analyze_uncached(texts, self._analyze_cleaned)
+    
+    def analyze_series(self, series):
+        """Analyze a pandas Series of texts in one batch, returning a Series of labels with the same index.
+        
+        Prefer this over series.apply(analyzer.analyze), which runs the model once per row.
+        """
+        unique_texts = series.drop_duplicates()
+        sentiments = dict(zip(unique_texts, self.analyze_batch(unique_texts.tolist())))
+        return series.map(sentiments)
+    
+    def analyze_many(self, texts, num_workers=4):
+        """Analyze a large list of texts, splitting unseen texts across worker processes.
+        
+        Every call starts a new pool of spawned workers, and each worker loads its own copy of
+        the model, so this only pays off for large bulk runs on the CPU. Because the workers are
+        spawned, scripts calling this must guard their entry point with
+        if __name__ == '__main__'.
+        """
+        # The lexicon fallback is cheap, and workers would only retry the failed model load
+        if self.model is None:
+            return self.analyze_batch(texts)
+        if num_workers < 2 or self.device.type == 'cuda':
+            return self.analyze_batch(texts)
+        return self._analyze_uncached(texts, lambda missing: self._analyze_in_workers(missing, num_workers))
+    
+    def _analyze_in_workers(self, cleaned_texts, num_workers):
+        """Analyze cleaned texts in contiguous shards, one per worker process, returning labels and fallback positions."""
+        shard_size = -(-len(cleaned_texts) // num_workers)
+        shards = [cleaned_texts[i:i + shard_size] for i in range(0, len(cleaned_texts), shard_size)]
+        
+        # Spawn rather than fork, since forking after torch has started its thread pools can deadlock
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(self._options,)) as pool:
+            results, fallback = [], set()
+            for labels, shard_fallback in pool.map(_analyze_shard, shards):
+                fallback.update(len(results) + i for i in shard_fallback)
+                results.extend(labels)
+            return results, fallback
+    
+    def _analyze_uncached(self, texts, analyze_cleaned):
+        """Look texts up in the cache and analyze the rest with analyze_cleaned."""
+        # Clean all texts up front; texts that only differ in URLs or mentions share a result
+        cleaned_texts = [self.clean_text(text) for text in texts]
+        results = [self._cached_result(text) for text in cleaned_texts]
+        
+        # Analyze each uncached text once, even if it appears several times
+        missing = list(dict.fromkeys(text for text, result in zip(cleaned_texts, results) if result is None))
+        if not missing:
+            return results
         
-        # If text is empty after cleaning, return neutral
-        if not cleaned_text:
-            return 'neutral'
+        labels, fallback = analyze_cleaned(missing)
+        sentiments = dict(zip(missing, labels))
+        
+        # Only cache model results, so texts that fell back to the lexicon are retried next time
+        for i, text in enumerate(missing):
+            if i not in fallback:
+                self._cache_result(text, labels[i])
+        
+        return [result if result is not None else sentiments[text] for text, result in zip(cleaned_texts, results)]
+    
+    def _analyze_cleaned(self, cleaned_texts):
+        """Analyze the sentiment of a list of cleaned texts, batching them through the model.
+        
+        Returns the labels and the set of positions that fell back to the lexicon-based analysis.
+        """
+        # Texts that are empty after cleaning are neutral
+        results = ['neutral'] * len(cleaned_texts)
+        fallback = set()
+        indices = [i for i, text in enumerate(cleaned_texts) if text]
+        if not indices:
+            return results, fallback
         
         # If model failed to load, use a simple lexicon-based approach
         if self.model is None or self.tokenizer is None:
-            return self._basic_sentiment_analysis(cleaned_text)
+            for i in indices:
+                results[i] = self._basic_sentiment_analysis(cleaned_texts[i])
+            fallback.update(indices)
+            return results, fallback
         
         try:
-            # Tokenize the text and prepare for the model
-            inputs = self.tokenizer(cleaned_text, return_tensors="pt", truncation=True, max_length=512)
-            
-            # Get prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = outputs.logits
-                
-            # Get sentiment scores
-            scores = torch.nn.functional.softmax(predictions, dim=1).detach().numpy()[0]
-            
-            # Determine sentiment
-            max_score_index = np.argmax(scores)
-            sentiment = self.labels[max_score_index]
-            
-            # Add a neutral category for borderline cases
-            confidence = scores[max_score_index]
-            if confidence < 0.65:  # Threshold for neutral sentiment
-                return 'neutral'
-                
-            return sentiment
-            
+            # Tokenize without padding to learn each text's length
+            encodings = self.tokenizer([cleaned_texts[i] for i in indices],
+                                       truncation=True, max_length=self.max_length)
         except Exception as e:
             print(f"Error in sentiment analysis: {e}")
-            return self._basic_sentiment_analysis(cleaned_text)
+            for i in indices:
+                results[i] = self._basic_sentiment_analysis(cleaned_texts[i])
+            fallback.update(indices)
+            return results, fallback
+        
+        input_ids = encodings['input_ids']
+        attention_mask = encodings['attention_mask']
+        
+        # Batch texts of similar length together so little padding is needed
+        order = sorted(range(len(indices)), key=lambda k: len(input_ids[k]))
+        for batch in self._length_buckets(order, input_ids):
+            try:
+                labels = self._predict({
+                    'input_ids': [input_ids[k] for k in batch],
+                    'attention_mask': [attention_mask[k] for k in batch]
+                })
+            except Exception as e:
+                print(f"Error in sentiment analysis: {e}")
+                labels = [self._basic_sentiment_analysis(cleaned_texts[indices[k]]) for k in batch]
+                fallback.update(indices[k] for k in batch)
+            
+            for k, label in zip(batch, labels):
+                results[indices[k]] = label
+        
+        return results, fallback
     
-    def _basic_sentiment_analysis(self, text):
-        """A simple rule-based sentiment analysis as fallback"""
+    def _length_buckets(self, order, input_ids):
+        """Split positions sorted by token length into batches within the token budget."""
+        token_budget = self.batch_size * self.max_length
+        batch = []
+        for k in order:
+            # Positions are sorted, so this text is the longest in the batch so far
+            if batch and (len(batch) + 1) * len(input_ids[k]) > token_budget:
+                yield batch
+                batch = []
+            batch.append(k)
+        if batch:
+            yield batch
+    
+    def _predict(self, encodings):
+        """Run the model on a batch of tokenized texts and return their labels."""
+        # Pad only to the longest text in this batch
+        inputs = self.tokenizer.pad(encodings, padding='longest', pad_to_multiple_of=self.pad_to_multiple_of,
+                                    return_tensors="pt").to(self.device)
         
-        # Lists of positive and negative words
-        positive_words = ['good', 'great', 'awesome', 'excellent', 'like', 'love', 'happy', 'best', 'better', 'amazing']
-        negative_words = ['bad', 'worst', 'terrible', 'awful', 'hate', 'dislike', 'sad', 'disappointing', 'sucks', 'poor']
+        # Get predictions for the whole batch, without autograd tracking
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+            predictions = outputs.logits
         
-        text = text.lower()
+        # Get sentiment scores, in full precision so low-precision logits don't saturate
+        scores = torch.softmax(predictions.float(), dim=-1)
+        
+        # Determine sentiment on the device, with a neutral category for borderline cases
+        confidence, label_indices = scores.max(dim=-1)
+        label_indices = torch.where(confidence < 0.65,  # Threshold for neutral sentiment
+                                    torch.full_like(label_indices, -1), label_indices)
+        
+        return [self._prediction_labels[index] for index in label_indices.tolist()]
+    
+    def _basic_sentiment_analysis(self, text):
+        """A simple rule-based sentiment analysis as fallback"""
+        # Split into words once and look each one up, rather than scanning the text per word
+        words = _WORD_RE.findall(text.lower())
         
         # Count occurrences
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        positive_count = sum(1 for word in words if word in self.POSITIVE_WORDS)
+        negative_count = sum(1 for word in words if word in self.NEGATIVE_WORDS)
         
         # Determine sentiment
         if positive_count > negative_count:
@@ -6,25 +6,46 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeSentimentChart();
     initializeSourceChart();
     
-    // Socket event for receiving data updates
+    // Local copy of the sentiment data, kept in sync with the server
+    let sentimentData = null;
+    
+    // Socket event for receiving the full data snapshot
     socket.on('update_data', function(data) {
-        // Update charts with new data
-        updateSentimentChart(data);
-        updateSourceChart(data);
+        sentimentData = data;
+        renderData();
+    });
+    
+    // Socket event for receiving the changes made by one analysis cycle
+    socket.on('update_delta', function(update) {
+        if (!sentimentData) {
+            return;
+        }
         
-        // Update the recent items table
-        updateRecentItemsTable(data.recent_items);
+        // Apply the counter changes
+        const deltas = update.deltas;
+        sentimentData.positive += deltas.positive;
+        sentimentData.negative += deltas.negative;
+        sentimentData.neutral += deltas.neutral;
+        sentimentData.sources.twitter += deltas.twitter;
+        sentimentData.sources.reddit += deltas.reddit;
+        
+        // Prepend the new items, keeping only as many as the server does
+        sentimentData.recent_items = update.new_items.concat(sentimentData.recent_items)
+            .slice(0, sentimentData.max_recent_items);
+        
+        renderData();
     });
     
     // Socket event for receiving configuration updates
     socket.on('config_data', function(config) {
-        // Update the search terms form with current values
-        document.getElementById('search-terms').placeholder = config.search_terms.join(', ');
-        document.getElementById('current-terms').textContent = config.search_terms.join(', ');
-        document.getElementById('max-items').placeholder = config.max_items;
-        
-        // Reset the status badge
-        updateSearchStatus('Current', 'bg-info');
+        applyConfig(config);
+    });
+    
+    // Socket event for receiving a configuration change together with the cleared data
+    socket.on('config_and_reset', function(update) {
+        applyConfig(update.config);
+        sentimentData = update.data;
+        renderData();
     });
     
     // Request initial configuration data
@@ -64,6 +85,27 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('max-items').value = '';
     });
     
+    // Function to render the charts and table from the local data
+    function renderData() {
+        // Update charts with new data
+        updateSentimentChart(sentimentData);
+        updateSourceChart(sentimentData);
+        
+        // Update the recent items table
+        updateRecentItemsTable(sentimentData.recent_items);
+    }
+    
+    // Function to apply configuration received from the server
+    function applyConfig(config) {
+        // Update the search terms form with current values
+        document.getElementById('search-terms').placeholder = config.search_terms.join(', ');
+        document.getElementById('current-terms').textContent = config.search_terms.join(', ');
+        document.getElementById('max-items').placeholder = config.max_items;
+        
+        // Reset the status badge
+        updateSearchStatus('Current', 'bg-info');
+    }
+    
     // Function to update the search status badge
     function updateSearchStatus(text, className) {
         const statusBadge = document.getElementById('search-status');